@@ -1,74 +1,135 @@
 """Provides a mechanism for not competing with other processes interacting with an MSAL cache."""
 import os
+import re
 import sys
-import errno
 import time
+import random
 import logging
-from distutils.version import LooseVersion
 import warnings
 
 import portalocker
 
+if sys.platform in ('darwin', 'linux'):
+    import fcntl
+else:
+    fcntl = None  # pylint: disable=invalid-name
+
 
 logger = logging.getLogger(__name__)
 
+# Shared by all locks in this process, and seeded from os.urandom(), so that
+# competing threads and processes won't draw the same jitter and wake up in lockstep
+_random = random.Random()  # pylint: disable=invalid-name
+
+
+def _parse_version(version):
+    """Parse the leading digits of major and minor, so that "1.4rc1" becomes (1, 4)"""
+    return tuple(
+        int(match.group()) if match else 0
+        for match in (re.match(r'\d+', part) for part in version.split('.')[:2]))
+
+
+# Support for passing through arguments to the open syscall was added in v1.4.0
+_OPEN_KWARGS = {'buffering': 0} if _parse_version(portalocker.__version__) >= (1, 4) else {}
+
+_RETRIABLE_ERRORS = (portalocker.exceptions.LockException,) if fcntl else (
+    portalocker.exceptions.LockException,
+    # On Windows, opening a file which another process (such as the .NET
+    # counterpart of this class) holds without sharing raises PermissionError.
+    # On POSIX, it would be a permanent error, not worth retrying.
+    PermissionError,
+    )
+
+
+class _FastLock(object):
+    """A minimal non-blocking exclusive lock, based on flock() directly.
+
+    It uses the same flock() primitive as portalocker does on POSIX,
+    so both interoperate, but it skips portalocker's buffered file object.
+    """
+    __slots__ = ('_lockpath', '_file_handle')
+
+    def __init__(self, lockfile_path):
+        self._lockpath = lockfile_path
+        self._file_handle = None
+
+    def __enter__(self):
+        fd = os.open(self._lockpath, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError as exp:
+                # Raise the same exception as portalocker does, for callers to catch uniformly
+                raise portalocker.exceptions.LockException(exp)
+            os.ftruncate(fd, 0)  # Truncate only after we own the lock
+            self._file_handle = os.fdopen(fd, 'wb', buffering=0)
+        except BaseException:
+            # Closing the fd also releases the flock, if we took it,
+            # otherwise other processes would wait for it until we exit
+            os.close(fd)
+            raise
+        return self._file_handle
+
+    def __exit__(self, *args):
+        if self._file_handle:
+            fcntl.flock(self._file_handle.fileno(), fcntl.LOCK_UN)
+            self._file_handle.close()
+            self._file_handle = None
+
 
 class CrossPlatLock(object):
     """Offers a mechanism for waiting until another process is finished interacting with a shared
     resource. This is specifically written to interact with a class of the same name in the .NET
     extensions library.
     """
+    __slots__ = ('_lockpath', '_lock', '__weakref__')
+
     def __init__(self, lockfile_path):
         self._lockpath = lockfile_path
-        # Support for passing through arguments to the open syscall was added in v1.4.0
-        open_kwargs = ({'buffering': 0}
-            if LooseVersion(portalocker.__version__) >= LooseVersion("1.4.0") else {})
-        self._lock = portalocker.Lock(
-            lockfile_path,
-            mode='wb+',
-            # In posix systems, we HAVE to use LOCK_EX(exclusive lock) bitwise ORed
-            # with LOCK_NB(non-blocking) to avoid blocking on lock acquisition.
-            # More information here:
-            # https://docs.python.org/3/library/fcntl.html#fcntl.lockf
-            flags=portalocker.LOCK_EX | portalocker.LOCK_NB,
-            **open_kwargs)
+        if fcntl:
+            self._lock = _FastLock(lockfile_path)
+        else:
+            self._lock = portalocker.Lock(
+                lockfile_path,
+                mode='wb+',
+                # In posix systems, we HAVE to use LOCK_EX(exclusive lock) bitwise ORed
+                # with LOCK_NB(non-blocking) to avoid blocking on lock acquisition.
+                # More information here:
+                # https://docs.python.org/3/library/fcntl.html#fcntl.lockf
+                flags=portalocker.LOCK_EX | portalocker.LOCK_NB,
+                timeout=0,  # Only try once, the retry with backoff is done in __enter__()
+                **_OPEN_KWARGS)
 
     def try_to_create_lock_file(self):
         """Do not call this. It will be removed in next release"""
         warnings.warn("try_to_create_lock_file() will be removed", DeprecationWarning)
-        return self._try_to_create_lock_file()
+        # The lock file is no longer removed after use, so we merely ensure it exists.
+        os.close(os.open(self._lockpath, os.O_WRONLY | os.O_CREAT, 0o600))
+        return True
 
-    def _try_to_create_lock_file(self):
+    def __enter__(self):
         timeout = 5
-        check_interval = 0.25
-        current_time = getattr(time, "monotonic", time.time)
+        delay = 0.001  # Exponential backoff, starting from 1 ms ...
+        max_delay = 1.0  # ... and capped at 1 second
+        current_time = time.monotonic
         timeout_end = current_time() + timeout
-        while timeout_end > current_time():
+        while True:
             try:
-                with open(self._lockpath, 'x'):
-                    return True
-            except ValueError:  # This needs to be the first clause, for Python 2 to hit it
-                logger.warning("Python 2 does not support atomic creation of file")
-                return False
-            except FileExistsError:  # Only Python 3 will reach this clause
-                logger.warning("Lock file exists, trying again after some time")
-                time.sleep(check_interval)
-        return False
-
-    def __enter__(self):
-        if not self._try_to_create_lock_file():
-            logger.warning("Failed to create lock file")
-        file_handle = self._lock.__enter__()
-        file_handle.write('{} {}'.format(os.getpid(), sys.argv[0]).encode('utf-8'))
+                file_handle = self._lock.__enter__()
+                break
+            except _RETRIABLE_ERRORS:
+                if current_time() >= timeout_end:
+                    raise
+                logger.debug("Lock file is locked, trying again after some time")
+                time.sleep(max(0, min(
+                    delay * (0.5 + _random.random()), timeout_end - current_time())))
+                delay = min(delay * 2, max_delay)
+        # os.fsencode() yields the raw bytes of argv, which might not be valid UTF-8
+        file_handle.write(str(os.getpid()).encode('ascii') + b' ' + os.fsencode(sys.argv[0]))
         return file_handle
 
     def __exit__(self, *args):
+        # The lock file is intentionally NOT removed here. Deleting it after unlocking
+        # would race with another process which has just opened the same path,
+        # which would then end up holding a lock on an orphaned inode.
         self._lock.__exit__(*args)
-        try:
-            # Attempt to delete the lockfile. In either of the failure cases enumerated below, it is
-            # likely that another process has raced this one and ended up clearing or locking the
-            # file for itself.
-            os.remove(self._lockpath)
-        except OSError as ex:  # pylint: disable=invalid-name
-            if ex.errno != errno.ENOENT and ex.errno != errno.EACCES:
-                raise
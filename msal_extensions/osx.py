@@ -3,6 +3,7 @@
 """Implements a macOS specific TokenCache, and provides auxiliary helper types."""
 
 import os
+import threading
 import ctypes as _ctypes
 
 OS_RESULT = _ctypes.c_int32  # pylint: disable=invalid-name
@@ -36,97 +37,131 @@ def _get_native_location(name):
     return '/System/Library/Frameworks/{0}.framework/{0}'.format(name)
 
 
-# Load native MacOS libraries
-_SECURITY = _ctypes.CDLL(_get_native_location('Security'))
-_CORE = _ctypes.CDLL(_get_native_location('CoreFoundation'))
-
-
-# Bind CFRelease from native MacOS libraries.
-_CORE_RELEASE = _CORE.CFRelease
-_CORE_RELEASE.argtypes = (
-    _ctypes.c_void_p,
-)
-
-# Bind SecCopyErrorMessageString from native MacOS libraries.
-# https://developer.apple.com/documentation/security/1394686-seccopyerrormessagestring?language=objc
-_SECURITY_COPY_ERROR_MESSAGE_STRING = _SECURITY.SecCopyErrorMessageString
-_SECURITY_COPY_ERROR_MESSAGE_STRING.argtypes = (
-    OS_RESULT,
-    _ctypes.c_void_p
-)
-_SECURITY_COPY_ERROR_MESSAGE_STRING.restype = _ctypes.c_char_p
-
-# Bind SecKeychainOpen from native MacOS libraries.
-# https://developer.apple.com/documentation/security/1396431-seckeychainopen
-_SECURITY_KEYCHAIN_OPEN = _SECURITY.SecKeychainOpen
-_SECURITY_KEYCHAIN_OPEN.argtypes = (
-    _ctypes.c_char_p,
-    _ctypes.POINTER(_ctypes.c_void_p)
-)
-_SECURITY_KEYCHAIN_OPEN.restype = OS_RESULT
-
-# Bind SecKeychainCopyDefault from native MacOS libraries.
-# https://developer.apple.com/documentation/security/1400743-seckeychaincopydefault?language=objc
-_SECURITY_KEYCHAIN_COPY_DEFAULT = _SECURITY.SecKeychainCopyDefault
-_SECURITY_KEYCHAIN_COPY_DEFAULT.argtypes = (
-    _ctypes.POINTER(_ctypes.c_void_p),
-)
-_SECURITY_KEYCHAIN_COPY_DEFAULT.restype = OS_RESULT
-
-
-# Bind SecKeychainItemFreeContent from native MacOS libraries.
-_SECURITY_KEYCHAIN_ITEM_FREE_CONTENT = _SECURITY.SecKeychainItemFreeContent
-_SECURITY_KEYCHAIN_ITEM_FREE_CONTENT.argtypes = (
-    _ctypes.c_void_p,
-    _ctypes.c_void_p,
-)
-_SECURITY_KEYCHAIN_ITEM_FREE_CONTENT.restype = OS_RESULT
-
-# Bind SecKeychainItemModifyAttributesAndData from native MacOS libraries.
-_SECURITY_KEYCHAIN_ITEM_MODIFY_ATTRIBUTES_AND_DATA = \
-    _SECURITY.SecKeychainItemModifyAttributesAndData
-_SECURITY_KEYCHAIN_ITEM_MODIFY_ATTRIBUTES_AND_DATA.argtypes = (
-    _ctypes.c_void_p,
-    _ctypes.c_void_p,
-    _ctypes.c_uint32,
-    _ctypes.c_void_p,
-)
-_SECURITY_KEYCHAIN_ITEM_MODIFY_ATTRIBUTES_AND_DATA.restype = OS_RESULT
-
-# Bind SecKeychainFindGenericPassword from native MacOS libraries.
-# https://developer.apple.com/documentation/security/1397301-seckeychainfindgenericpassword?language=objc
-_SECURITY_KEYCHAIN_FIND_GENERIC_PASSWORD = _SECURITY.SecKeychainFindGenericPassword
-_SECURITY_KEYCHAIN_FIND_GENERIC_PASSWORD.argtypes = (
-    _ctypes.c_void_p,
-    _ctypes.c_uint32,
-    _ctypes.c_char_p,
-    _ctypes.c_uint32,
-    _ctypes.c_char_p,
-    _ctypes.POINTER(_ctypes.c_uint32),
-    _ctypes.POINTER(_ctypes.c_void_p),
-    _ctypes.POINTER(_ctypes.c_void_p),
-)
-_SECURITY_KEYCHAIN_FIND_GENERIC_PASSWORD.restype = OS_RESULT
-# Bind SecKeychainAddGenericPassword from native MacOS
-# https://developer.apple.com/documentation/security/1398366-seckeychainaddgenericpassword?language=objc
-_SECURITY_KEYCHAIN_ADD_GENERIC_PASSWORD = _SECURITY.SecKeychainAddGenericPassword
-_SECURITY_KEYCHAIN_ADD_GENERIC_PASSWORD.argtypes = (
-    _ctypes.c_void_p,
-    _ctypes.c_uint32,
-    _ctypes.c_char_p,
-    _ctypes.c_uint32,
-    _ctypes.c_char_p,
-    _ctypes.c_uint32,
-    _ctypes.c_char_p,
-    _ctypes.POINTER(_ctypes.c_void_p),
-)
-_SECURITY_KEYCHAIN_ADD_GENERIC_PASSWORD.restype = OS_RESULT
+# Native MacOS libraries and function prototypes are loaded lazily by _bind(),
+# so that merely importing this module does not dlopen() the frameworks.
+_SECURITY = None
+_CORE = None
+_CORE_RELEASE = None
+_SECURITY_COPY_ERROR_MESSAGE_STRING = None
+_SECURITY_KEYCHAIN_OPEN = None
+_SECURITY_KEYCHAIN_COPY_DEFAULT = None
+_SECURITY_KEYCHAIN_ITEM_FREE_CONTENT = None
+_SECURITY_KEYCHAIN_ITEM_MODIFY_ATTRIBUTES_AND_DATA = None
+_SECURITY_KEYCHAIN_FIND_GENERIC_PASSWORD = None
+_SECURITY_KEYCHAIN_ADD_GENERIC_PASSWORD = None
+_BIND_LOCK = threading.Lock()
+
+
+def _bind():
+    """Load native MacOS libraries and bind function prototypes, once."""
+    if _SECURITY is not None:  # Fast path, without taking the lock
+        return
+    with _BIND_LOCK:  # Otherwise a concurrent caller could see half-configured prototypes
+        if _SECURITY is None:
+            _load_and_bind()
+
+
+def _load_and_bind():
+    # pylint: disable=global-statement,invalid-name
+    global _SECURITY, _CORE, _CORE_RELEASE, _SECURITY_COPY_ERROR_MESSAGE_STRING
+    global _SECURITY_KEYCHAIN_OPEN, _SECURITY_KEYCHAIN_COPY_DEFAULT
+    global _SECURITY_KEYCHAIN_ITEM_FREE_CONTENT, _SECURITY_KEYCHAIN_ITEM_MODIFY_ATTRIBUTES_AND_DATA
+    global _SECURITY_KEYCHAIN_FIND_GENERIC_PASSWORD, _SECURITY_KEYCHAIN_ADD_GENERIC_PASSWORD
+    # Load native MacOS libraries
+    security = _ctypes.CDLL(_get_native_location('Security'))
+    core = _ctypes.CDLL(_get_native_location('CoreFoundation'))
+
+    # Bind CFRelease from native MacOS libraries.
+    _CORE_RELEASE = core.CFRelease
+    _CORE_RELEASE.argtypes = (
+        _ctypes.c_void_p,
+    )
+
+    # Bind SecCopyErrorMessageString from native MacOS libraries.
+    # https://developer.apple.com/documentation/security/1394686-seccopyerrormessagestring?language=objc
+    _SECURITY_COPY_ERROR_MESSAGE_STRING = security.SecCopyErrorMessageString
+    _SECURITY_COPY_ERROR_MESSAGE_STRING.argtypes = (
+        OS_RESULT,
+        _ctypes.c_void_p
+    )
+    _SECURITY_COPY_ERROR_MESSAGE_STRING.restype = _ctypes.c_char_p
+
+    # Bind SecKeychainOpen from native MacOS libraries.
+    # https://developer.apple.com/documentation/security/1396431-seckeychainopen
+    _SECURITY_KEYCHAIN_OPEN = security.SecKeychainOpen
+    _SECURITY_KEYCHAIN_OPEN.argtypes = (
+        _ctypes.c_char_p,
+        _ctypes.POINTER(_ctypes.c_void_p)
+    )
+    _SECURITY_KEYCHAIN_OPEN.restype = OS_RESULT
+
+    # Bind SecKeychainCopyDefault from native MacOS libraries.
+    # https://developer.apple.com/documentation/security/1400743-seckeychaincopydefault?language=objc
+    _SECURITY_KEYCHAIN_COPY_DEFAULT = security.SecKeychainCopyDefault
+    _SECURITY_KEYCHAIN_COPY_DEFAULT.argtypes = (
+        _ctypes.POINTER(_ctypes.c_void_p),
+    )
+    _SECURITY_KEYCHAIN_COPY_DEFAULT.restype = OS_RESULT
+
+    # Bind SecKeychainItemFreeContent from native MacOS libraries.
+    _SECURITY_KEYCHAIN_ITEM_FREE_CONTENT = security.SecKeychainItemFreeContent
+    _SECURITY_KEYCHAIN_ITEM_FREE_CONTENT.argtypes = (
+        _ctypes.c_void_p,
+        _ctypes.c_void_p,
+    )
+    _SECURITY_KEYCHAIN_ITEM_FREE_CONTENT.restype = OS_RESULT
+
+    # Bind SecKeychainItemModifyAttributesAndData from native MacOS libraries.
+    _SECURITY_KEYCHAIN_ITEM_MODIFY_ATTRIBUTES_AND_DATA = \
+        security.SecKeychainItemModifyAttributesAndData
+    _SECURITY_KEYCHAIN_ITEM_MODIFY_ATTRIBUTES_AND_DATA.argtypes = (
+        _ctypes.c_void_p,
+        _ctypes.c_void_p,
+        _ctypes.c_uint32,
+        _ctypes.c_void_p,
+    )
+    _SECURITY_KEYCHAIN_ITEM_MODIFY_ATTRIBUTES_AND_DATA.restype = OS_RESULT
+
+    # Bind SecKeychainFindGenericPassword from native MacOS libraries.
+    # https://developer.apple.com/documentation/security/1397301-seckeychainfindgenericpassword?language=objc
+    _SECURITY_KEYCHAIN_FIND_GENERIC_PASSWORD = security.SecKeychainFindGenericPassword
+    _SECURITY_KEYCHAIN_FIND_GENERIC_PASSWORD.argtypes = (
+        _ctypes.c_void_p,
+        _ctypes.c_uint32,
+        _ctypes.c_char_p,
+        _ctypes.c_uint32,
+        _ctypes.c_char_p,
+        _ctypes.POINTER(_ctypes.c_uint32),
+        _ctypes.POINTER(_ctypes.c_void_p),
+        _ctypes.POINTER(_ctypes.c_void_p),
+    )
+    _SECURITY_KEYCHAIN_FIND_GENERIC_PASSWORD.restype = OS_RESULT
+    # Bind SecKeychainAddGenericPassword from native MacOS
+    # https://developer.apple.com/documentation/security/1398366-seckeychainaddgenericpassword?language=objc
+    _SECURITY_KEYCHAIN_ADD_GENERIC_PASSWORD = security.SecKeychainAddGenericPassword
+    _SECURITY_KEYCHAIN_ADD_GENERIC_PASSWORD.argtypes = (
+        _ctypes.c_void_p,
+        _ctypes.c_uint32,
+        _ctypes.c_char_p,
+        _ctypes.c_uint32,
+        _ctypes.c_char_p,
+        _ctypes.c_uint32,
+        _ctypes.c_char_p,
+        _ctypes.POINTER(_ctypes.c_void_p),
+    )
+    _SECURITY_KEYCHAIN_ADD_GENERIC_PASSWORD.restype = OS_RESULT
+
+    _CORE = core
+    _SECURITY = security  # Assigned last, to mark the completion of binding
 
 
 class Keychain(object):
     """Encapsulates the interactions with a particular MacOS Keychain."""
+    __slots__ = ('_ref', '_filename', '__weakref__')
+
     def __init__(self, filename=None):
         # type: (str) -> None
+        _bind()
         self._ref = _ctypes.c_void_p()
 
         if filename:
@@ -135,7 +170,8 @@ class Keychain(object):
         else:
             self._filename = None
 
-    def __enter__(self):
+    def open(self):
+        """Open this keychain. Prefer using this object as a context manager instead."""
         if self._filename:
             status = _SECURITY_KEYCHAIN_OPEN(self._filename, self._ref)
         else:
@@ -145,10 +181,17 @@ class Keychain(object):
             raise OSError(status)
         return self
 
-    def __exit__(self, *args):
+    def close(self):
+        """Release this keychain, which was opened by :func:`open`."""
         if self._ref:
             _CORE_RELEASE(self._ref)
 
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, *args):
+        self.close()
+
     def get_generic_password(self, service, account_name):
         # type: (str, str) -> str
         """Fetch the password associated with a particular service and account.
@@ -159,14 +202,28 @@ class Keychain(object):
         """
         service = service.encode('utf-8')
         account_name = account_name.encode('utf-8')
-
+        return self.get_generic_password_bytes(
+            service, len(service), account_name, len(account_name)).decode('utf-8')
+
+    def get_generic_password_bytes(self, service, service_len, account_name, account_len):
+        # type: (bytes, int, bytes, int) -> bytes
+        """Same as :func:`get_generic_password`, but in bytes, without UTF-8 codec.
+
+        :param service: The UTF-8 encoded service name.
+        :param service_len: The length of the encoded service name.
+        :param account_name: The UTF-8 encoded account name.
+        :param account_len: The length of the encoded account name.
+        :return: The raw bytes of the password.
+        """
+        # Out-parameters are allocated per call, so that one Keychain can be shared
+        # across threads without ending up freeing the same contents twice
         length = _ctypes.c_uint32()
         contents = _ctypes.c_void_p()
         exit_status = _SECURITY_KEYCHAIN_FIND_GENERIC_PASSWORD(
             self._ref,
-            len(service),
+            service_len,
             service,
-            len(account_name),
+            account_len,
             account_name,
             length,
             contents,
@@ -176,10 +233,9 @@ class Keychain(object):
         if exit_status:
             raise KeychainError(exit_status=exit_status)
 
-        value = _ctypes.create_string_buffer(length.value)
-        _ctypes.memmove(value, contents.value, length.value)
+        raw = _ctypes.string_at(contents, length.value)  # One copy, straight into bytes
         _SECURITY_KEYCHAIN_ITEM_FREE_CONTENT(None, contents)
-        return value.raw.decode('utf-8')
+        return raw
 
     def set_generic_password(self, service, account_name, value):
         # type: (str, str, str) -> None
@@ -191,21 +247,39 @@ class Keychain(object):
         """
         service = service.encode('utf-8')
         account_name = account_name.encode('utf-8')
-        value = value.encode('utf-8')
-
+        self.set_generic_password_bytes(
+            service, len(service), account_name, len(account_name), value.encode('utf-8'))
+
+    def set_generic_password_bytes(
+            self, service, service_len, account_name, account_len, value):
+        # type: (bytes, int, bytes, int, bytes) -> None
+        """Same as :func:`set_generic_password`, but in bytes, without UTF-8 codec.
+
+        :param service: The UTF-8 encoded service name.
+        :param service_len: The length of the encoded service name.
+        :param account_name: The UTF-8 encoded account name.
+        :param account_len: The length of the encoded account name.
+        :param value: The bytes that should be used as the password.
+        """
+        length = _ctypes.c_uint32()
+        contents = _ctypes.c_void_p()
         entry = _ctypes.c_void_p()
         find_exit_status = _SECURITY_KEYCHAIN_FIND_GENERIC_PASSWORD(
             self._ref,
-            len(service),
+            service_len,
             service,
-            len(account_name),
+            account_len,
             account_name,
-            None,
-            None,
+            length,
+            contents,
             entry,
         )
 
         if not find_exit_status:
+            current = _ctypes.string_at(contents, length.value)
+            _SECURITY_KEYCHAIN_ITEM_FREE_CONTENT(None, contents)
+            if current == value:
+                return  # Unchanged. Skip the relatively expensive keychain write.
             modify_exit_status = _SECURITY_KEYCHAIN_ITEM_MODIFY_ATTRIBUTES_AND_DATA(
                 entry,
                 None,
@@ -218,9 +292,9 @@ class Keychain(object):
         elif find_exit_status == KeychainError.ITEM_NOT_FOUND:
             add_exit_status = _SECURITY_KEYCHAIN_ADD_GENERIC_PASSWORD(
                 self._ref,
-                len(service),
+                service_len,
                 service,
-                len(account_name),
+                account_len,
                 account_name,
                 len(value),
                 value,
@@ -10,17 +10,9 @@ import abc
 import os
 import errno
 import logging
-import sys
-try:
-    from pathlib import Path  # Built-in in Python 3
-except ImportError:
-    from pathlib2 import Path  # An extra lib for Python 2
-
-
-try:
-    ABC = abc.ABC
-except AttributeError:  # Python 2.7, abc exists, but not ABC
-    ABC = abc.ABCMeta("ABC", (object,), {"__slots__": ()})  # type: ignore
+import tempfile
+import threading
+from pathlib import Path
 
 
 logger = logging.getLogger(__name__)
@@ -32,23 +24,34 @@ def _mkdir_p(path):
     If the path provided is an existing file, this function raises an exception.
     :param path: The directory name that should be created.
     """
-    if not path:
-        return  # NO-OP
-
-    if sys.version_info >= (3, 2):
+    if path:
         os.makedirs(path, exist_ok=True)
-        return
 
-    # This fallback implementation is based on a Stack Overflow question:
-    # https://stackoverflow.com/questions/600268/mkdir-p-functionality-in-python
-    # Known issue: it won't work when the path is a root folder like "C:\\"
+
+def _atomic_write(location, data):
+    """Write data into a temporary file, and then rename it to location.
+
+    Readers of location would therefore see either the old or the new content,
+    but never a partially written file.
+    """
+    # A unique temp file in the same directory, so that concurrent writers,
+    # even threads within one process, won't share it, and os.replace() stays atomic
+    fd, tmp = tempfile.mkstemp(
+        dir=os.path.dirname(location) or os.curdir,
+        prefix=os.path.basename(location) + ".", suffix=".tmp")
     try:
-        os.makedirs(path)
-    except OSError as exp:
-        if exp.errno == errno.EEXIST and os.path.isdir(path):
-            pass
-        else:
-            raise
+        try:
+            view = memoryview(data)
+            while view:  # os.write() could, in theory, write only part of the data
+                view = view[os.write(fd, view):]
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.replace(tmp, location)  # Atomic on POSIX, and MoveFileEx() on Windows
+    except EnvironmentError:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
 
 
 # We do not aim to wrap every os-specific exception.
@@ -67,8 +70,9 @@ class PersistenceNotFound(IOError):  # Use IOError rather than OSError as base,
             location)
 
 
-class BasePersistence(ABC):
+class BasePersistence(abc.ABC):
     """An abstract persistence defining the common interface of this family"""
+    __slots__ = ('__weakref__',)  # Subclasses remain weak-referenceable
 
     is_encrypted = False  # Default to False. To be overridden by sub-classes.
 
@@ -100,9 +104,23 @@ class BasePersistence(ABC):
         """Return the file path which this persistence stores (meta)data into"""
         raise NotImplementedError
 
+    def exists(self):
+        """Return whether this persistence exists, without raising PersistenceNotFound.
+
+        Pollers could call this first, and skip load() or time_last_modified()
+        when nothing has been saved yet. Sub-classes may override this
+        with a cheaper check than this default implementation.
+        """
+        try:
+            self.time_last_modified()
+            return True
+        except PersistenceNotFound:
+            return False
+
 
 class FilePersistence(BasePersistence):
     """A generic persistence, storing data in a plain-text file"""
+    __slots__ = ('_location',)
 
     def __init__(self, location):
         if not location:
@@ -113,14 +131,13 @@ class FilePersistence(BasePersistence):
     def save(self, content):
         # type: (str) -> None
         """Save the content into this persistence"""
-        with open(self._location, 'w+') as handle:
-            handle.write(content)
+        _atomic_write(self._location, content.encode('utf-8'))
 
     def load(self):
         # type: () -> str
         """Load content from this persistence"""
         try:
-            with open(self._location, 'r') as handle:
+            with open(self._location, 'r', encoding='utf-8') as handle:  # Same as save()
                 return handle.read()
         except EnvironmentError as exp:  # EnvironmentError in Py 2.7 works across platform
             if exp.errno == errno.ENOENT:
@@ -150,6 +167,14 @@ class FilePersistence(BasePersistence):
         """To touch this file-based persistence without writing content into it"""
         Path(self._location).touch()  # For os.path.getmtime() to work
 
+    def exists(self):
+        """Return whether this persistence exists, without raising PersistenceNotFound.
+
+        Pollers could call this first, and skip load() or time_last_modified()
+        when nothing has been saved yet.
+        """
+        return os.path.exists(self._location)
+
     def get_location(self):
         return self._location
 
@@ -157,6 +182,7 @@ class FilePersistence(BasePersistence):
 class FilePersistenceWithDataProtection(FilePersistence):
     """A generic persistence with data stored in a file,
     protected by Win32 encryption APIs on Windows"""
+    __slots__ = ('_dp_agent',)
     is_encrypted = True
 
     def __init__(self, location, entropy=''):
@@ -168,9 +194,7 @@ class FilePersistenceWithDataProtection(FilePersistence):
 
     def save(self, content):
         # type: (str) -> None
-        data = self._dp_agent.protect(content)
-        with open(self._location, 'wb+') as handle:
-            handle.write(data)
+        _atomic_write(self._location, self._dp_agent.protect(content))
 
     def load(self):
         # type: () -> str
@@ -195,6 +219,9 @@ class FilePersistenceWithDataProtection(FilePersistence):
 class KeychainPersistence(BasePersistence):
     """A generic persistence with data stored in,
     and protected by native Keychain libraries on OSX"""
+    __slots__ = (
+        '_file_persistence', '_KeychainError', '_service_b', '_account_b',
+        '_keychain', '_keychain_opened', '_keychain_lock')
     is_encrypted = True
 
     def __init__(self, signal_location, service_name, account_name):
@@ -206,29 +233,51 @@ class KeychainPersistence(BasePersistence):
             raise ValueError("service_name and account_name are required")
         from .osx import Keychain, KeychainError  # pylint: disable=import-outside-toplevel
         self._file_persistence = FilePersistence(signal_location)  # Favor composition
-        self._Keychain = Keychain  # pylint: disable=invalid-name
         self._KeychainError = KeychainError  # pylint: disable=invalid-name
-        self._service_name = service_name
-        self._account_name = account_name
+        # Encoded once here, rather than on every save() and load()
+        self._service_b = service_name.encode('utf-8')
+        self._account_b = account_name.encode('utf-8')
+        # The keychain handle is opened on first use, and then reused until __del__()
+        self._keychain = Keychain()
+        self._keychain_opened = False
+        self._keychain_lock = threading.Lock()
+
+    def _get_keychain(self):
+        # Caller shall hold self._keychain_lock
+        if not self._keychain_opened:
+            self._keychain.open()
+            self._keychain_opened = True
+        return self._keychain
+
+    def __del__(self):
+        try:
+            if self._keychain_opened:
+                self._keychain.close()
+        except Exception:  # pylint: disable=broad-except
+            pass  # Do not raise during garbage collection
 
     def save(self, content):
-        with self._Keychain() as locker:
-            locker.set_generic_password(
-                self._service_name, self._account_name, content)
+        with self._keychain_lock:
+            self._get_keychain().set_generic_password_bytes(
+                self._service_b, len(self._service_b),
+                self._account_b, len(self._account_b),
+                content.encode('utf-8') if isinstance(content, str) else content)
         self._file_persistence.touch()  # For time_last_modified()
 
     def load(self):
-        with self._Keychain() as locker:
+        with self._keychain_lock:
             try:
-                return locker.get_generic_password(
-                    self._service_name, self._account_name)
+                return self._get_keychain().get_generic_password_bytes(
+                    self._service_b, len(self._service_b),
+                    self._account_b, len(self._account_b)).decode('utf-8')
             except self._KeychainError as ex:  # pylint: disable=invalid-name
                 if ex.exit_status == self._KeychainError.ITEM_NOT_FOUND:
                     # This happens when a load() is called before a save().
                     # We map it into cross-platform error for unified catching.
                     raise PersistenceNotFound(
                         location="Service:{} Account:{}".format(
-                            self._service_name, self._account_name),
+                            self._service_b.decode('utf-8'),
+                            self._account_b.decode('utf-8')),
                         message=(
                             "Keychain persistence not initialized. "
                             "You can recover by call a save() first."),
@@ -238,6 +287,10 @@ class KeychainPersistence(BasePersistence):
     def time_last_modified(self):
         return self._file_persistence.time_last_modified()
 
+    def exists(self):
+        """Return whether the signal file exists, i.e. whether save() was called before"""
+        return self._file_persistence.exists()
+
     def get_location(self):
         return self._file_persistence.get_location()
 
@@ -245,6 +298,7 @@ class KeychainPersistence(BasePersistence):
 class LibsecretPersistence(BasePersistence):
     """A generic persistence with data stored in,
     and protected by native libsecret libraries on Linux"""
+    __slots__ = ('_agent', '_file_persistence')
     is_encrypted = True
 
     def __init__(self, signal_location, schema_name, attributes, **kwargs):
@@ -282,6 +336,10 @@ class LibsecretPersistence(BasePersistence):
     def time_last_modified(self):
         return self._file_persistence.time_last_modified()
 
+    def exists(self):
+        """Return whether the signal file exists, i.e. whether save() was called before"""
+        return self._file_persistence.exists()
+
     def get_location(self):
         return self._file_persistence.get_location()
 
@@ -1,6 +1,8 @@
+import json
 import os
 import shutil
 import tempfile
+import time
 import sys
 
 import msal
@@ -44,8 +46,22 @@ def test_current_platform_cache_roundtrip_with_alias_class(temp_location):
 def test_persisted_token_cache(temp_location):
     _test_token_cache_roundtrip(PersistedTokenCache(FilePersistence(temp_location)))
 
-def test_file_not_found_error_is_not_raised():
-    persistence = FilePersistence('non_existing_file')
+def test_file_not_found_error_is_not_raised(temp_location):
+    persistence = FilePersistence(temp_location)
     cache = PersistedTokenCache(persistence=persistence)
     # An exception raised here will fail the test case as it is supposed to be a NO-OP
     cache.find('')
+
+def test_persisted_token_cache_picks_up_save_from_another_instance(temp_location):
+    FilePersistence(temp_location).save(json.dumps({}))
+    cache_a = PersistedTokenCache(FilePersistence(temp_location))
+    assert cache_a.find(msal.TokenCache.CredentialType.REFRESH_TOKEN) == []
+
+    # Mimic another process, which saves a new entry right after cache_a's lookup
+    cache_b = PersistedTokenCache(FilePersistence(temp_location))
+    entry = {"credential_type": "RefreshToken", "secret": "rt", "client_id": "cid"}
+    cache_b._persistence.save(json.dumps({"RefreshToken": {"key": entry}}))
+    future = time.time() + 10  # Avoid coarse mtime granularity on some file systems
+    os.utime(temp_location, (future, future))
+
+    assert cache_a.find(msal.TokenCache.CredentialType.REFRESH_TOKEN) == [entry]
@@ -1,18 +1,116 @@
+import multiprocessing
+import os
+
 import pytest
+from portalocker.exceptions import LockException
+
+from msal_extensions import cache_lock
 from msal_extensions.cache_lock import CrossPlatLock
 
 
-def test_ensure_file_deleted():
-    lockfile = './test_lock_1.txt'
+@pytest.fixture
+def fake_time(monkeypatch):
+    """Replace the clock used by cache_lock, so that timeouts elapse instantly"""
+    class FakeTime(object):
+        now = 0.0
+        sleeps = []
+
+        @classmethod
+        def monotonic(cls):
+            return cls.now
+
+        @classmethod
+        def sleep(cls, seconds):
+            cls.sleeps.append(seconds)
+            cls.now += seconds
+    monkeypatch.setattr(cache_lock, "time", FakeTime)
+    return FakeTime
+
 
+def _hold_lock(lockfile, acquired, release):
+    with CrossPlatLock(lockfile):
+        acquired.set()
+        release.wait(30)
+
+
+def test_lock_file_is_kept_and_reusable():
+    lockfile = './test_lock_1.txt'
     try:
-        FileNotFoundError
-    except NameError:
-        FileNotFoundError = IOError
+        with CrossPlatLock(lockfile):
+            pass
+        assert os.path.exists(lockfile), "Lock file should not be removed after unlock"
 
+        with CrossPlatLock(lockfile):  # A stale lock file shall not block us
+            pass
+    finally:
+        os.remove(lockfile)
+
+
+def test_lock_backs_off_exponentially_until_timeout(tmpdir, fake_time):
+    lockfile = str(tmpdir.join("test_lock_2.txt"))
     with CrossPlatLock(lockfile):
+        with pytest.raises(LockException):
+            with CrossPlatLock(lockfile):
+                pass
+    sleeps = fake_time.sleeps
+    assert sleeps[0] < 0.01, "First retry should happen soon"
+    assert sleeps[5] > sleeps[0], "Delay should grow"
+    assert max(sleeps) <= 1.5, "Delay should be capped"
+    assert 5 <= sum(sleeps) <= 5.01, "Should give up after the timeout"
+
+
+def test_lock_held_by_another_process_is_retried_then_times_out(tmpdir, fake_time):
+    lockfile = str(tmpdir.join("test_lock_3.txt"))
+    acquired, release = multiprocessing.Event(), multiprocessing.Event()
+    holder = multiprocessing.Process(target=_hold_lock, args=(lockfile, acquired, release))
+    holder.start()
+    try:
+        assert acquired.wait(30), "The other process should have acquired the lock"
+        with pytest.raises(LockException):
+            with CrossPlatLock(lockfile):
+                pass
+        assert len(fake_time.sleeps) > 1, "Should retry before giving up"
+    finally:
+        release.set()
+        holder.join()
+    with CrossPlatLock(lockfile):  # Available again, once the other process released it
         pass
 
-    with pytest.raises(FileNotFoundError):
-        with open(lockfile):
+
+@pytest.mark.skipif(cache_lock.fcntl is None, reason="Windows retries on PermissionError")
+def test_permission_error_is_not_retried_on_posix(tmpdir, fake_time, monkeypatch):
+    lockfile = str(tmpdir.join("test_lock_4.txt"))
+    original_open = os.open
+    def deny(path, *args, **kwargs):
+        if path == lockfile:
+            raise PermissionError("Mimic a lock file owned by another user")
+        return original_open(path, *args, **kwargs)
+    monkeypatch.setattr(os, "open", deny)
+    with pytest.raises(PermissionError):
+        with CrossPlatLock(lockfile):
             pass
+    assert not fake_time.sleeps, "A permanent error should surface immediately"
+
+
+@pytest.mark.skipif(cache_lock.fcntl is None, reason="Requires flock()")
+def test_lock_is_released_when_acquisition_fails_midway(tmpdir, monkeypatch):
+    lockfile = str(tmpdir.join("test_lock_5.txt"))
+    def fail(*args):
+        raise OSError("Mimic a failure after flock() succeeded")
+    with monkeypatch.context() as patch:
+        patch.setattr(cache_lock.os, "ftruncate", fail)
+        with pytest.raises(OSError):
+            with CrossPlatLock(lockfile):
+                pass
+    with CrossPlatLock(lockfile):  # Shall not be blocked by a leaked fd
+        pass
+
+
+@pytest.mark.parametrize("version, expected", [
+    ("1.4.0", (1, 4)),
+    ("1.4rc1", (1, 4)),
+    ("1.4b0", (1, 4)),
+    ("2.0", (2, 0)),
+    ])
+def test_parse_version_tolerates_pre_releases(version, expected):
+    assert cache_lock._parse_version(version) == expected
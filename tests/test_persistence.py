@@ -2,7 +2,9 @@ import os
 import sys
 import shutil
 import tempfile
+import threading
 import logging
+import weakref
 
 import pytest
 
@@ -25,8 +27,10 @@ def _test_persistence_roundtrip(persistence):
     payload = 'arbitrary content'
     persistence.save(payload)
     assert persistence.load() == payload
+    assert persistence.exists()
 
 def _test_nonexistent_persistence(persistence):
+    assert not persistence.exists()
     with pytest.raises(PersistenceNotFound):
         persistence.load()
     with pytest.raises(PersistenceNotFound):
@@ -35,9 +39,74 @@ def _test_nonexistent_persistence(persistence):
 def test_file_persistence(temp_location):
     _test_persistence_roundtrip(FilePersistence(temp_location))
 
+def test_file_persistence_roundtrip_non_ascii_and_leaves_no_temp_file(temp_location):
+    persistence = FilePersistence(temp_location)
+    persistence.save("old content")
+    payload = u'caf\u00e9 \u4e2d\u6587'
+    persistence.save(payload)
+    assert persistence.load() == payload
+    assert persistence.exists()
+    assert os.listdir(os.path.dirname(temp_location)) == [
+        os.path.basename(temp_location)]
+
+def test_file_persistence_concurrent_saves_do_not_interleave(temp_location):
+    persistence = FilePersistence(temp_location)
+    payloads = [str(i) * 100000 for i in range(8)]
+    errors = []
+    def save(payload):
+        try:
+            persistence.save(payload)
+        except Exception as exp:  # Otherwise an exception in thread would go unnoticed
+            errors.append(exp)
+    threads = [threading.Thread(target=save, args=(payload,)) for payload in payloads]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert persistence.load() in payloads
+
+def test_base_persistence_exists_defaults_to_time_last_modified():
+    class InMemoryPersistence(BasePersistence):
+        def __init__(self):
+            self.content = None
+        def save(self, content):
+            self.content = content
+        def load(self):
+            return self.content
+        def time_last_modified(self):
+            if self.content is None:
+                raise PersistenceNotFound()
+            return 0
+        def get_location(self):
+            return None
+    persistence = InMemoryPersistence()
+    assert not persistence.exists()
+    persistence.save("foo")
+    assert persistence.exists()
+
+def test_file_persistence_is_weak_referenceable(temp_location):
+    persistence = FilePersistence(temp_location)
+    assert weakref.ref(persistence)() is persistence
+
 def test_nonexistent_file_persistence(temp_location):
     _test_nonexistent_persistence(FilePersistence(temp_location))
 
+def test_file_persistence_time_last_modified(temp_location):
+    persistence = FilePersistence(temp_location)
+    with pytest.raises(PersistenceNotFound):
+        persistence.time_last_modified()
+    persistence.save("foo")
+    assert persistence.time_last_modified() == os.path.getmtime(temp_location)
+    os.utime(temp_location, (1, 1))  # Mimic another process updating the file
+    assert persistence.time_last_modified() == 1
+
+def test_file_persistence_exists(temp_location):
+    persistence = FilePersistence(temp_location)
+    assert not persistence.exists()
+    persistence.save("foo")
+    assert persistence.exists()
+
 @pytest.mark.skipif(
     is_running_on_travis_ci or not sys.platform.startswith('win'),
     reason="Requires Windows Desktop")
@@ -85,4 +154,3 @@ def test_nonexistent_libsecret_persistence(temp_location):
         random_schema_name,
         {"my_attr_1": random_value, "my_attr_2": random_value},
         ))
-